@@ -6,18 +6,65 @@ Twitter推文爬取脚本
 """
 
 import tweepy
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone, time as dt_time
 import os
 import time
-from typing import List, Dict, Optional, Any, Union
+from typing import List, Dict, Optional, Any, Union, Set, Tuple
 import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import base64
+import html
 from urllib.parse import urljoin
 from dataclasses import dataclass
 from enum import Enum
 import logging
-from collections import defaultdict, deque
+import re
+import sqlite3
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter, defaultdict, deque
+
+
+# Twitter API 要求 RFC3339 带时区的时间，统一使用 UTC
+_UTC = timezone.utc
+
+# 时间范围的每日起止时刻
+_START_OF_DAY = dt_time(0, 0, 0)
+_END_OF_DAY = dt_time(23, 59, 59)
+
+# 请求推文时附带的字段（仅包含后续处理实际读取的字段，id/text 默认返回）
+# 预先拼接为逗号分隔字符串，tweepy 直接作为查询参数使用
+_TWEET_FIELDS = ','.join(('created_at', 'public_metrics', 'lang'))
+
+# 用户名格式（字母、数字、下划线、点，最长15个字符）
+_USERNAME_RE = re.compile(r'^[A-Za-z0-9_.]{1,15}\Z')
+
+# Twitter 批量用户查询接受的用户名格式（不含点，否则整批请求返回400）
+_TWITTER_HANDLE_RE = re.compile(r'^[A-Za-z0-9_]{1,15}\Z')
+
+# 推文时间输出长度（isoformat 的 'YYYY-MM-DD HH:MM:SS' 部分，去掉时区后缀）
+_TIMESTAMP_LEN = 19
+
+
+def _aggregate(tweets: List[Dict]) -> Tuple[int, int, int, int]:
+    """
+    单次遍历汇总推文的统计摘要所需指标
+    
+    Args:
+        tweets: 推文列表
+        
+    Returns:
+        (推文数, 点赞数, 转发数, 回复数) 元组
+    """
+    likes = retweets = replies = count = 0
+    for tweet in tweets:
+        likes += tweet['like_count']
+        retweets += tweet['retweet_count']
+        replies += tweet['reply_count']
+        count += 1
+    return count, likes, retweets, replies
 
 
 class TwitterAPITier(Enum):
@@ -53,21 +100,27 @@ class TwitterRateLimitManager:
     RATE_LIMITS = {
         TwitterAPITier.FREE: {
             'get_user': RateLimit(1, 24 * 60, is_per_user=True),  # 1/24h per user
+            'get_users': RateLimit(1, 24 * 60, is_per_user=True),  # 1/24h per user
             'get_users_tweets': RateLimit(1, 15, is_per_user=True),  # 1/15min per user
             'search_recent': RateLimit(1, 15, is_per_user=True),  # 1/15min per user
         },
         TwitterAPITier.BASIC: {
             'get_user': RateLimit(500, 24 * 60, is_per_app=True),  # 500/24h per app
+            'get_users': RateLimit(500, 24 * 60, is_per_app=True),  # 500/24h per app
             'get_users_tweets': RateLimit(10, 15, is_per_app=True),  # 10/15min per app  
             'search_recent': RateLimit(60, 15, is_per_app=True),  # 60/15min per app
         },
         TwitterAPITier.PRO: {
             'get_user': RateLimit(300, 15, is_per_app=True),  # 300/15min per app
+            'get_users': RateLimit(300, 15, is_per_app=True),  # 300/15min per app
             'get_users_tweets': RateLimit(1500, 15, is_per_app=True),  # 1500/15min per app
             'search_recent': RateLimit(450, 15, is_per_app=True),  # 450/15min per app
         }
     }
     
+    # 未知端点的默认限制（最严格）
+    DEFAULT_RATE_LIMIT = RateLimit(1, 15)
+    
     def __init__(self, api_tier: TwitterAPITier = TwitterAPITier.FREE, 
                  safety_factor: float = 0.8, enable_monitoring: bool = True):
         """
@@ -82,12 +135,20 @@ class TwitterRateLimitManager:
         self.safety_factor = safety_factor
         self.enable_monitoring = enable_monitoring
         
+        # 端点速率限制配置（初始化时解析一次，避免每次请求重复查表）
+        self._rate_limits: Dict[str, RateLimit] = dict(self.RATE_LIMITS.get(api_tier, {}))
+        self.rl_get_user = self.get_rate_limit('get_user')
+        self.rl_get_users_tweets = self.get_rate_limit('get_users_tweets')
+        
         # 请求时间记录 {endpoint: deque of timestamps}
         self.request_history: Dict[str, deque] = defaultdict(lambda: deque())
         
         # 锁定机制
         self._lock = threading.Lock()
         
+        # 429后的恢复时间 {endpoint: timestamp}，在此之前不发起新请求
+        self._resume_at: Dict[str, float] = {}
+        
         # 响应头信息记录
         self.rate_limit_status: Dict[str, Dict] = {}
         
@@ -106,38 +167,50 @@ class TwitterRateLimitManager:
     
     def get_rate_limit(self, endpoint: str) -> RateLimit:
         """获取指定端点的速率限制配置"""
-        limits = self.RATE_LIMITS.get(self.api_tier, {})
-        return limits.get(endpoint, RateLimit(1, 15))  # 默认最严格限制
+        return self._rate_limits.get(endpoint, self.DEFAULT_RATE_LIMIT)  # 默认最严格限制
     
     def wait_for_rate_limit(self, endpoint: str) -> None:
         """等待满足速率限制要求"""
+        self.wait_for(endpoint, self.get_rate_limit(endpoint))
+    
+    def wait_for(self, endpoint: str, rate_limit: RateLimit) -> None:
+        """
+        按已解析的速率限制配置等待
+        
+        Args:
+            endpoint: 端点名称（用于请求历史记录）
+            rate_limit: 端点对应的速率限制配置，如 self.rl_get_users_tweets
+        """
         with self._lock:
-            rate_limit = self.get_rate_limit(endpoint)
             current_time = time.time()
             
             # 清理过期的请求记录
             self._cleanup_request_history(endpoint, current_time, rate_limit.window_seconds)
             
-            # 计算当前时间窗口内的请求数
-            recent_requests = len(self.request_history[endpoint])
+            # 计算当前时间窗口内的请求数（含已预约、尚未发出的请求）
+            history = self.request_history[endpoint]
+            recent_requests = len(history)
             max_requests = int(rate_limit.requests_per_window * self.safety_factor)
             
-            if recent_requests >= max_requests:
-                # 需要等待
-                if recent_requests > 0:  # 确保有历史记录再访问
-                    oldest_request = self.request_history[endpoint][0]
-                    wait_time = rate_limit.window_seconds - (current_time - oldest_request)
-                    
-                    if wait_time > 0:
-                        print(f"⏳ [{endpoint}] 速率限制：需要等待 {wait_time:.1f} 秒")
-                        print(f"   📊 当前窗口内请求数: {recent_requests}/{max_requests}")
-                        time.sleep(wait_time)
+            # 预约请求时间片：窗口已满时，排在第 max_requests 个最近请求过期之后；
+            # 且不早于429后的恢复时间（恢复时间不计入请求历史，不占用配额）
+            request_time = max(current_time, self._resume_at.get(endpoint, 0.0))
+            if history and recent_requests >= max_requests:
+                request_time = max(history[-max(1, max_requests)] + rate_limit.window_seconds,
+                                   history[-1], request_time)
             
-            # 记录当前请求时间
-            self.request_history[endpoint].append(current_time)
+            # 记录预约的请求时间
+            history.append(request_time)
             
             if self.enable_monitoring:
                 self._log_request_status(endpoint, rate_limit)
+        
+        # 在锁外等待，其他线程可同时为后续时间片排队
+        wait_time = request_time - current_time
+        if wait_time > 0:
+            print(f"⏳ [{endpoint}] 速率限制：需要等待 {wait_time:.1f} 秒")
+            print(f"   📊 当前窗口内请求数: {recent_requests}/{max_requests}")
+            time.sleep(wait_time)
     
     def _cleanup_request_history(self, endpoint: str, current_time: float, window_seconds: int) -> None:
         """清理过期的请求记录"""
@@ -179,15 +252,23 @@ class TwitterRateLimitManager:
     
     def handle_rate_limit_exceeded(self, endpoint: str, retry_after: Optional[int] = None) -> float:
         """处理速率限制超出，返回等待时间"""
-        self.retry_attempts[endpoint] += 1
-        attempt = self.retry_attempts[endpoint]
+        with self._lock:
+            self.retry_attempts[endpoint] += 1
+            attempt = self.retry_attempts[endpoint]
+            
+            if retry_after:
+                wait_time = retry_after
+            else:
+                # 指数退避策略
+                wait_time = min(self.backoff_base * (2 ** (attempt - 1)), self.backoff_max)
+            
+            # 记录共享的恢复时间，其他线程在 wait_for 中排到该时间之后，一起退避
+            resume_time = time.time() + wait_time
+            self._resume_at[endpoint] = max(self._resume_at.get(endpoint, 0.0), resume_time)
         
         if retry_after:
-            wait_time = retry_after
             print(f"🚫 [{endpoint}] API速率限制，服务器要求等待 {wait_time} 秒")
         else:
-            # 指数退避策略
-            wait_time = min(self.backoff_base * (2 ** (attempt - 1)), self.backoff_max)
             print(f"🚫 [{endpoint}] 速率限制，指数退避等待 {wait_time:.1f} 秒 (尝试 #{attempt})")
         
         print(f"   💡 建议升级到更高等级的API计划以获得更多配额")
@@ -237,10 +318,141 @@ class TwitterRateLimitManager:
                 if status.get('remaining'):
                     print(f"   API剩余: {status['remaining']}")
 
+# 创建文档被语雀限流（429）时的返回标记，调用方可在退避后重新提交
+_RATE_LIMITED = object()
+
+# 语雀文档的推文Markdown模板（模块加载时构建一次）
+_MD_TEMPLATE = """# 🐦 来自 @{username} 的推文
+
+## 📋 推文信息
+
+- **发布时间**: {created_at}
+- **原文链接**: [{url}]({url})
+- **推文ID**: `{id}`
+- **语言**: {language}
+
+## 📝 推文内容
+
+> {text}
+
+## 📊 互动数据
+
+| 指标 | 数量 |
+|------|------|
+| 👍 点赞 | {like_count:,} |
+| 🔄 转发 | {retweet_count:,} |
+| 💬 回复 | {reply_count:,} |
+| 📝 引用 | {quote_count:,} |
+
+---
+
+*通过 Twitter推文爬虫 自动生成于 {generated_at}*
+"""
+
+# 语雀文档的推文HTML模板（模块加载时构建一次）
+_HTML_TEMPLATE = """
+<div class="twitter-post">
+    <div class="tweet-header">
+        <h3>🐦 来自 @{username} 的推文</h3>
+        <p class="tweet-meta">
+            <strong>发布时间:</strong> {created_at}<br>
+            <strong>原文链接:</strong> <a href="{url}" target="_blank">{url}</a>
+        </p>
+    </div>
+    
+    <div class="tweet-content">
+        <blockquote>
+            {text}
+        </blockquote>
+    </div>
+    
+    <div class="tweet-stats">
+        <table class="engagement-stats">
+            <tr>
+                <td>👍 <strong>{like_count:,}</strong> 点赞</td>
+                <td>🔄 <strong>{retweet_count:,}</strong> 转发</td>
+            </tr>
+            <tr>
+                <td>💬 <strong>{reply_count:,}</strong> 回复</td>
+                <td>📝 <strong>{quote_count:,}</strong> 引用</td>
+            </tr>
+        </table>
+    </div>
+    
+    <div class="tweet-footer">
+        <p><small>📱 语言: {language} | 推文ID: {id}</small></p>
+        <p><small>🕐 生成时间: {generated_at}</small></p>
+    </div>
+</div>
+"""
+
+# HTML 推文的静态样式（不含占位符，直接拼接）
+_TWEET_CSS = """
+<style>
+.twitter-post {
+    border: 1px solid #e1e8ed;
+    border-radius: 12px;
+    padding: 20px;
+    margin: 20px 0;
+    background: #f8f9fa;
+}
+.tweet-header h3 {
+    color: #1da1f2;
+    margin-bottom: 10px;
+}
+.tweet-content blockquote {
+    font-size: 18px;
+    line-height: 1.6;
+    margin: 15px 0;
+    padding: 15px;
+    background: white;
+    border-left: 4px solid #1da1f2;
+    border-radius: 8px;
+}
+.engagement-stats {
+    background: white;
+    padding: 10px;
+    border-radius: 8px;
+    margin: 10px 0;
+    width: 100%;
+}
+.engagement-stats td {
+    padding: 5px 10px;
+    text-align: center;
+}
+.tweet-meta, .tweet-footer {
+    color: #657786;
+    font-size: 14px;
+}
+</style>
+"""
+
+
 class YuquePublisher:
     """语雀文档发布器"""
     
-    def __init__(self, token: str, namespace: str, base_url: str = "https://yuque-api.antfin-inc.com"):
+    # HTTP连接池配置
+    POOL_CONNECTIONS = 32
+    POOL_MAXSIZE = 32
+    
+    # 文档标题缓存有效期（秒）
+    DOCUMENT_CACHE_TTL = 60
+    
+    # 连接检查成功结果的缓存有效期（秒）
+    CONNECTION_CACHE_TTL = 60
+    
+    # 分页获取文档列表时每页的文档数（语雀API上限）
+    DOCUMENT_PAGE_SIZE = 100
+    
+    # 所有线程共享的文档创建间隔（秒）：正常时为下限，收到429后自适应放大
+    CREATE_INTERVAL = 1.5  # 与原先逐条发布的间隔一致，语雀API可能需要更长间隔
+    CREATE_INTERVAL_MAX = 60.0
+    
+    # 批量创建时被限流（429）的文档最多重新提交的次数
+    CREATE_RATE_LIMIT_RETRIES = 2
+    
+    def __init__(self, token: str, namespace: str, base_url: str = "https://yuque-api.antfin-inc.com",
+                 cache_path: Optional[str] = None):
         """
         初始化语雀发布器
         
@@ -248,12 +460,19 @@ class YuquePublisher:
             token: 语雀API Token
             namespace: 知识库命名空间，格式如 'group_login/book_slug' 或 'user_login/book_slug'
             base_url: 语雀API基础URL，默认为线上地址
+            cache_path: 已发布推文记录的sqlite文件路径（可选），重复运行时直接跳过已发布的推文
         """
         self.token = token
+        self.cache_path = os.path.expanduser(cache_path) if cache_path else None
         self.namespace = namespace
         self.base_url = base_url.rstrip('/')
         self.api_url = f"{self.base_url}/api/v2/"
         
+        # 固定的API地址，初始化时拼接一次
+        self._user_url = f"{self.api_url}user"
+        self._repo_url = f"{self.api_url}repos/{namespace}"
+        self._docs_url = f"{self._repo_url}/docs"
+        
         self.headers = {
             'User-Agent': 'Twitter-Yuque-Publisher/1.0',
             'X-Auth-Token': token,
@@ -265,14 +484,134 @@ class YuquePublisher:
             self.owner_login, self.book_slug = namespace.split('/', 1)
         else:
             raise ValueError("命名空间格式错误，应为 'owner_login/book_slug'")
+        
+        # 复用连接的HTTP会话，避免每次请求重新建立TCP/TLS连接
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=self.POOL_CONNECTIONS,
+            pool_maxsize=self.POOL_MAXSIZE,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                raise_on_status=False  # 重试耗尽后返回响应，由调用方按状态码处理
+            )
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # 读多写少的查询结果缓存
+        self._title_cache: Optional[Set[str]] = None
+        self._title_cache_time = 0.0
+        self._repo_access_ok_time = 0.0
+        self._connection_ok_time = 0.0
+        
+        # 文档创建节流（跨线程共享）
+        self._create_lock = threading.Lock()
+        self._next_create_time = 0.0
+        self._create_interval = self.CREATE_INTERVAL
+        
+        if self.cache_path:
+            self._init_publish_cache()
+    
+    def _init_publish_cache(self) -> None:
+        """初始化已发布推文记录表"""
+        cache_dir = os.path.dirname(self.cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        
+        with closing(sqlite3.connect(self.cache_path)) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS published ("
+                "tweet_id TEXT, namespace TEXT, doc_id INTEGER, ts INTEGER, "
+                "PRIMARY KEY (tweet_id, namespace))"
+            )
+    
+    def get_published_tweet_ids(self, tweet_ids: List[str]) -> Set[str]:
+        """
+        查询已发布记录中存在的推文ID
+        
+        Args:
+            tweet_ids: 待查询的推文ID列表
+            
+        Returns:
+            已发布的推文ID集合；未启用记录时返回空集合
+        """
+        if not self.cache_path or not tweet_ids:
+            return set()
+        
+        published = set()
+        with closing(sqlite3.connect(self.cache_path)) as conn:
+            # 分批查询，避免超过sqlite参数数量上限
+            for i in range(0, len(tweet_ids), 500):
+                chunk = tweet_ids[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f"SELECT tweet_id FROM published WHERE namespace = ? AND tweet_id IN ({placeholders})",
+                    [self.namespace, *chunk]
+                )
+                published.update(row[0] for row in rows)
+        return published
+    
+    def record_published(self, results: List[Dict]) -> None:
+        """
+        将发布成功的推文写入已发布记录
+        
+        Args:
+            results: 发布结果列表
+        """
+        if not self.cache_path:
+            return
+        
+        now = int(time.time())
+        rows = [
+            (str(r['tweet_id']), self.namespace, r.get('doc_id'), now)
+            for r in results if r['status'] == 'success'
+        ]
+        if rows:
+            with closing(sqlite3.connect(self.cache_path)) as conn, conn:
+                conn.executemany("INSERT OR IGNORE INTO published VALUES (?, ?, ?, ?)", rows)
+    
+    def close(self) -> None:
+        """关闭HTTP会话，释放连接池"""
+        self.session.close()
     
-    def test_connection(self) -> bool:
-        """测试API连接和权限"""
+    def __enter__(self) -> 'YuquePublisher':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+    
+    def test_connection(self, force: bool = False) -> bool:
+        """
+        测试API连接和权限
+        
+        连接成功的结果会缓存 CONNECTION_CACHE_TTL 秒，期间重复调用不再发起请求
+        
+        Args:
+            force: 是否忽略缓存重新检查
+            
+        Returns:
+            连接及知识库访问正常返回True
+        """
+        if (not force and self._connection_ok_time
+                and time.monotonic() - self._connection_ok_time < self.CONNECTION_CACHE_TTL):
+            return True
+        
+        if force:
+            self._repo_access_ok_time = 0.0
+        
+        connection_ok = self._check_connection()
+        self._connection_ok_time = time.monotonic() if connection_ok else 0.0
+        return connection_ok
+    
+    def _check_connection(self) -> bool:
+        """请求用户信息和知识库信息，检查API连接和权限"""
         try:
             # 测试用户信息
-            response = requests.get(
-                f"{self.api_url}user",
-                headers=self.headers,
+            response = self.session.get(
+                self._user_url,
                 timeout=10
             )
             
@@ -294,16 +633,19 @@ class YuquePublisher:
                 print(f"❌ 语雀连接失败，状态码: {response.status_code}")
                 print(f"   响应内容: {response.text[:200]}")
                 return False
-        except Exception as e:
+        except (requests.RequestException, ValueError) as e:
             print(f"❌ 语雀连接测试失败: {str(e)}")
             return False
     
     def _test_repo_access(self) -> bool:
-        """测试知识库访问权限"""
+        """测试知识库访问权限（访问成功后缓存 CONNECTION_CACHE_TTL 秒）"""
+        if (self._repo_access_ok_time
+                and time.monotonic() - self._repo_access_ok_time < self.CONNECTION_CACHE_TTL):
+            return True
+        
         try:
-            response = requests.get(
-                f"{self.api_url}repos/{self.namespace}",
-                headers=self.headers,
+            response = self.session.get(
+                self._repo_url,
                 timeout=10
             )
             
@@ -312,6 +654,7 @@ class YuquePublisher:
                 if 'data' in repo_data:
                     repo_info = repo_data['data']
                     print(f"✅ 知识库访问正常: {repo_info.get('name', 'Unknown')}")
+                    self._repo_access_ok_time = time.monotonic()
                     return True
                 else:
                     print(f"❌ 知识库响应格式异常")
@@ -322,7 +665,7 @@ class YuquePublisher:
             else:
                 print(f"❌ 知识库访问失败，状态码: {response.status_code}")
                 return False
-        except Exception as e:
+        except (requests.RequestException, ValueError) as e:
             print(f"❌ 知识库访问测试失败: {str(e)}")
             return False
     
@@ -341,6 +684,23 @@ class YuquePublisher:
         Returns:
             创建成功返回文档信息，失败返回None
         """
+        doc_info = self._create_document(title, body, slug, format_type, public)
+        if doc_info is _RATE_LIMITED:
+            print(f"❌ 语雀文档创建失败，状态码: 429")
+            return None
+        return doc_info
+    
+    def _create_document(self, title: str, body: str, slug: Optional[str] = None,
+                         format_type: str = 'markdown', public: int = 0) -> Any:
+        """
+        创建语雀文档（被限流时返回 _RATE_LIMITED，由调用方决定是否重新提交）
+        
+        Args:
+            参数同 create_document
+            
+        Returns:
+            创建成功返回文档信息，被限流返回 _RATE_LIMITED，其他失败返回None
+        """
         doc_data = {
             'title': title,
             'body': body,
@@ -352,12 +712,15 @@ class YuquePublisher:
             doc_data['slug'] = slug
         
         try:
-            response = requests.post(
-                f"{self.api_url}repos/{self.namespace}/docs",
-                headers=self.headers,
+            response = self.session.post(
+                self._docs_url,
                 json=doc_data,
                 timeout=30
             )
+            self._adjust_create_interval(response)
+            
+            if response.status_code == 429:
+                return _RATE_LIMITED
             
             # print(response.json())
             if response.status_code == 200:
@@ -365,6 +728,9 @@ class YuquePublisher:
                 if 'data' in doc_response:
                     doc_info = doc_response['data']
                     print(f"✅ 语雀文档创建成功: {doc_info.get('title', 'Unknown')}")
+                    # 新文档加入已缓存的标题集合，缓存有效期内的重复检查也能看到它
+                    if self._title_cache is not None:
+                        self._title_cache.add(title)
                     return doc_info
                 else:
                     print(f"❌ 语雀文档创建响应格式异常")
@@ -375,32 +741,32 @@ class YuquePublisher:
                     error_data = response.json()
                     if 'message' in error_data:
                         error_info = f" - {error_data['message']}"
-                except:
+                except ValueError:
                     pass
                     
                 print(f"❌ 语雀文档创建失败，状态码: {response.status_code}{error_info}")
                 if response.status_code == 422:
                     print(f"   💡 提示: 请检查文档标题是否重复或参数格式是否正确")
                 return None
-        except Exception as e:
+        except (requests.RequestException, ValueError) as e:
             print(f"❌ 创建语雀文档时发生错误: {str(e)}")
             return None
     
-    def get_documents(self, offset: int = 0) -> List[Dict]:
+    def get_documents(self, offset: int = 0, limit: int = DOCUMENT_PAGE_SIZE) -> List[Dict]:
         """
         获取知识库文档列表
         
         Args:
             offset: 偏移量，用于分页
+            limit: 每页文档数
             
         Returns:
             文档列表
         """
         try:
-            params = {'offset': offset}
-            response = requests.get(
-                f"{self.api_url}repos/{self.namespace}/docs",
-                headers=self.headers,
+            params = {'offset': offset, 'limit': limit}
+            response = self.session.get(
+                self._docs_url,
                 params=params,
                 timeout=10
             )
@@ -414,10 +780,41 @@ class YuquePublisher:
             else:
                 print(f"❌ 获取文档列表失败，状态码: {response.status_code}")
                 return []
-        except Exception as e:
+        except (requests.RequestException, ValueError) as e:
             print(f"❌ 获取文档列表时发生错误: {str(e)}")
             return []
     
+    def get_document_titles(self, use_cache: bool = True) -> Set[str]:
+        """
+        获取知识库中已有文档的标题集合
+        
+        结果会缓存 DOCUMENT_CACHE_TTL 秒，同一批次内多次发布只请求一次文档列表
+        
+        Args:
+            use_cache: 是否使用缓存
+            
+        Returns:
+            文档标题集合（发布成功的新文档标题会直接加入该集合）
+        """
+        now = time.monotonic()
+        if (use_cache and self._title_cache is not None
+                and now - self._title_cache_time < self.DOCUMENT_CACHE_TTL):
+            return self._title_cache
+        
+        # 按页读取全部文档，避免只检查第一页导致漏判重复
+        titles = set()
+        offset = 0
+        while True:
+            docs = self.get_documents(offset=offset)
+            titles.update(doc.get('title') for doc in docs)
+            if len(docs) < self.DOCUMENT_PAGE_SIZE:
+                break
+            offset += len(docs)
+        
+        self._title_cache = titles
+        self._title_cache_time = now
+        return self._title_cache
+    
     def check_document_exists(self, title: str) -> bool:
         """
         检查指定标题的文档是否已存在
@@ -428,15 +825,8 @@ class YuquePublisher:
         Returns:
             存在返回True，不存在返回False
         """
-        try:
-            docs = self.get_documents()
-            for doc in docs:
-                if doc.get('title') == title:
-                    return True
-            return False
-        except Exception as e:
-            print(f"❌ 检查文档是否存在时发生错误: {str(e)}")
-            return False
+        # 使用缓存的标题集合，集合查找代替逐条比较
+        return title in self.get_document_titles()
     
     def format_tweet_as_markdown(self, tweet: Dict, username: str) -> str:
         """
@@ -449,135 +839,130 @@ class YuquePublisher:
         Returns:
             格式化后的Markdown内容
         """
-        # 处理推文内容中的换行符
-        tweet_content = tweet['text'].replace('\n', '\n\n')
-        
-        # 如果推文内容包含链接，处理链接格式
-        # 这里可以进一步优化链接的处理
-        
-        markdown_content = f"""# 🐦 来自 @{username} 的推文
-
-## 📋 推文信息
-
-- **发布时间**: {tweet['created_at']}
-- **原文链接**: [{tweet['url']}]({tweet['url']})
-- **推文ID**: `{tweet['id']}`
-- **语言**: {tweet.get('language', 'unknown')}
-
-## 📝 推文内容
-
-> {tweet_content}
-
-## 📊 互动数据
-
-| 指标 | 数量 |
-|------|------|
-| 👍 点赞 | {tweet['like_count']:,} |
-| 🔄 转发 | {tweet['retweet_count']:,} |
-| 💬 回复 | {tweet['reply_count']:,} |
-| 📝 引用 | {tweet['quote_count']:,} |
-
----
-
-*通过 Twitter推文爬虫 自动生成于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*
-"""
-        return markdown_content
+        return _MD_TEMPLATE.format(
+            username=username,
+            created_at=tweet['created_at'],
+            url=tweet['url'],
+            id=tweet['id'],
+            language=tweet.get('language', 'unknown'),
+            text=tweet['text'].replace('\n', '\n\n'),  # 处理推文内容中的换行符
+            like_count=tweet['like_count'],
+            retweet_count=tweet['retweet_count'],
+            reply_count=tweet['reply_count'],
+            quote_count=tweet['quote_count'],
+            generated_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        )
     
-    def format_tweet_as_html(self, tweet: Dict, username: str) -> str:
+    def format_tweet_as_html(self, tweet: Dict, username: str, include_css: bool = True) -> str:
         """
         将推文格式化为HTML格式（保留兼容性）
         
         Args:
             tweet: 推文数据
             username: 用户名
+            include_css: 是否附带内联样式（站点已有样式时可关闭）
             
         Returns:
             格式化后的HTML内容
         """
-        # 分离动态内容和静态样式
-        html_content = f"""
-<div class="twitter-post">
-    <div class="tweet-header">
-        <h3>🐦 来自 @{username} 的推文</h3>
-        <p class="tweet-meta">
-            <strong>发布时间:</strong> {tweet['created_at']}<br>
-            <strong>原文链接:</strong> <a href="{tweet['url']}" target="_blank">{tweet['url']}</a>
-        </p>
-    </div>
+        # 推文内容、链接等来自外部，转义后再嵌入HTML
+        # （API 返回的文本已含 &amp; 等实体，先还原再统一转义，避免重复转义）
+        html_content = _HTML_TEMPLATE.format_map({
+            **tweet,
+            'username': html.escape(username),
+            'url': html.escape(tweet['url']),
+            'language': html.escape(tweet.get('language') or 'unknown'),
+            'text': html.escape(html.unescape(tweet['text']), quote=False).replace('\n', '<br>'),
+            'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
+        
+        if include_css:
+            return html_content + _TWEET_CSS
+        return html_content
     
-    <div class="tweet-content">
-        <blockquote>
-            {tweet['text'].replace(chr(10), '<br>')}
-        </blockquote>
-    </div>
+    def _throttle_create(self, interval: Optional[float] = None) -> None:
+        """
+        文档创建节流：无论并发线程数多少，两次创建之间至少间隔 interval 秒
+        
+        Args:
+            interval: 最小间隔（秒），默认使用自适应间隔
+        """
+        with self._create_lock:
+            if interval is None:
+                interval = self._create_interval
+            now = time.monotonic()
+            wait_time = self._next_create_time - now
+            self._next_create_time = max(now, self._next_create_time) + interval
+        
+        # 在锁外等待，其他线程可同时预约后续时间片
+        if wait_time > 0:
+            time.sleep(wait_time)
     
-    <div class="tweet-stats">
-        <table class="engagement-stats">
-            <tr>
-                <td>👍 <strong>{tweet['like_count']:,}</strong> 点赞</td>
-                <td>🔄 <strong>{tweet['retweet_count']:,}</strong> 转发</td>
-            </tr>
-            <tr>
-                <td>💬 <strong>{tweet['reply_count']:,}</strong> 回复</td>
-                <td>📝 <strong>{tweet['quote_count']:,}</strong> 引用</td>
-            </tr>
-        </table>
-    </div>
+    def _adjust_create_interval(self, response: requests.Response) -> None:
+        """
+        根据创建文档的响应调整自适应间隔
+        
+        收到429时按 Retry-After（缺省为当前间隔的两倍）放大间隔并暂停后续创建，
+        成功时逐步回落到 CREATE_INTERVAL
+        
+        Args:
+            response: 创建文档请求的响应
+        """
+        with self._create_lock:
+            if response.status_code == 429:
+                try:
+                    retry_after = float(response.headers.get('Retry-After', ''))
+                except ValueError:
+                    retry_after = self._create_interval * 2
+                self._create_interval = min(max(self._create_interval * 2, retry_after),
+                                            self.CREATE_INTERVAL_MAX)
+                # 服务器要求等待期间，所有线程都不再发起新的创建请求
+                self._next_create_time = max(self._next_create_time,
+                                             time.monotonic() + retry_after)
+                print(f"⏳ 语雀API请求过快，文档创建间隔调整为 {self._create_interval:.1f} 秒")
+            elif response.status_code == 200:
+                self._create_interval = max(self._create_interval / 2, self.CREATE_INTERVAL)
     
-    <div class="tweet-footer">
-        <p><small>📱 语言: {tweet.get('language', 'unknown')} | 推文ID: {tweet['id']}</small></p>
-        <p><small>🕐 生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</small></p>
-    </div>
-</div>
-"""
+    def create_documents(self, docs: List[Dict], max_workers: int = 4,
+                         interval: Optional[float] = None) -> List[Optional[Dict]]:
+        """
+        并发批量创建语雀文档（复用会话连接池中的长连接）
         
-        # 静态样式部分（避免f-string解析问题）
-        css_styles = """
-<style>
-.twitter-post {
-    border: 1px solid #e1e8ed;
-    border-radius: 12px;
-    padding: 20px;
-    margin: 20px 0;
-    background: #f8f9fa;
-}
-.tweet-header h3 {
-    color: #1da1f2;
-    margin-bottom: 10px;
-}
-.tweet-content blockquote {
-    font-size: 18px;
-    line-height: 1.6;
-    margin: 15px 0;
-    padding: 15px;
-    background: white;
-    border-left: 4px solid #1da1f2;
-    border-radius: 8px;
-}
-.engagement-stats {
-    background: white;
-    padding: 10px;
-    border-radius: 8px;
-    margin: 10px 0;
-    width: 100%;
-}
-.engagement-stats td {
-    padding: 5px 10px;
-    text-align: center;
-}
-.tweet-meta, .tweet-footer {
-    color: #657786;
-    font-size: 14px;
-}
-</style>
-"""
+        Args:
+            docs: 文档参数列表，每项为 create_document 的关键字参数
+            max_workers: 并发创建文档的最大线程数
+            interval: 所有线程共享的两次创建最小间隔（秒），默认使用自适应间隔
+            
+        Returns:
+            创建结果列表（与 docs 顺序一致），失败项为None；
+            被限流（429）的文档在退避后重新提交，超过 CREATE_RATE_LIMIT_RETRIES 次才记为失败
+        """
+        if not docs:
+            return []
         
-        return html_content + css_styles
+        def create_one(doc: Dict) -> Optional[Dict]:
+            for attempt in range(self.CREATE_RATE_LIMIT_RETRIES + 1):
+                # 发布间隔，避免过快请求（全局节流，与线程数无关）
+                # 收到429后共享时间表已推迟到 Retry-After 之后，重新提交会在此等待
+                self._throttle_create(interval)
+                doc_info = self._create_document(**doc)
+                if doc_info is not _RATE_LIMITED:
+                    return doc_info
+                if attempt < self.CREATE_RATE_LIMIT_RETRIES:
+                    print(f"🔁 语雀API限流，稍后重新提交: {doc.get('title', '')}")
+            
+            print(f"❌ 语雀文档创建失败（多次被限流）: {doc.get('title', '')}")
+            return None
+        
+        # 文档创建是纯网络I/O，使用线程池并发请求
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(docs)))) as executor:
+            return list(executor.map(create_one, docs))
     
     def publish_tweets_as_documents(self, tweets_data: Dict[str, List[Dict]], 
                                    doc_format: str = 'markdown',
                                    public: int = 0,
-                                   avoid_duplicates: bool = True) -> List[Dict]:
+                                   avoid_duplicates: bool = True,
+                                   max_workers: int = 4) -> List[Dict]:
         """
         将推文发布为语雀文档
         
@@ -586,13 +971,25 @@ class YuquePublisher:
             doc_format: 文档格式，支持 'markdown', 'html'
             public: 公开状态，0-私密，1-公开
             avoid_duplicates: 是否避免重复发布
+            max_workers: 并发创建文档的最大线程数
             
         Returns:
-            发布结果列表
+            发布结果列表（与推文顺序一致）
         """
-        results = []
+        results: List[Optional[Dict]] = []
+        jobs = []  # (结果索引, 用户名, 推文, 文档参数)
+        
+        # 已发布记录中的推文直接跳过（本地查询，无网络请求）
+        published_ids = set()
+        if avoid_duplicates:
+            published_ids = self.get_published_tweet_ids(
+                [str(tweet['id']) for tweets in tweets_data.values() for tweet in tweets]
+            )
+        
+        # 预先获取一次已有文档标题，逐条检查时不再发起额外请求
+        existing_titles = self.get_document_titles() if avoid_duplicates else set()
         
-        # 发布每个用户的推文
+        # 筛选每个用户需要发布的推文
         for username, tweets in tweets_data.items():
             if not tweets:
                 continue
@@ -600,11 +997,24 @@ class YuquePublisher:
             print(f"\n📝 正在发布 @{username} 的推文到语雀...")
             
             for i, tweet in enumerate(tweets):
+                # 推文ID统一为字符串（兼容整数ID），用于标题、slug和已发布记录
+                tweet_id = str(tweet['id'])
+                
                 # 创建文档标题
-                title = f"@{username} 的推文 - {tweet['created_at'][:10]} - {tweet['id'][-8:]}"
+                title = f"@{username} 的推文 - {tweet['created_at'][:10]} - {tweet_id[-8:]}"
                 
                 # 检查是否重复
-                if avoid_duplicates and self.check_document_exists(title):
+                if tweet_id in published_ids:
+                    print(f"⚠️ 推文已发布过，跳过: {title}")
+                    results.append({
+                        'username': username,
+                        'tweet_id': tweet['id'],
+                        'status': 'skipped',
+                        'reason': 'already_published'
+                    })
+                    continue
+                
+                if avoid_duplicates and title in existing_titles:
                     print(f"⚠️ 文档已存在，跳过: {title}")
                     results.append({
                         'username': username,
@@ -620,48 +1030,58 @@ class YuquePublisher:
                 else:
                     content = self.format_tweet_as_html(tweet, username)
                 
-                # 生成文档路径（可选）
-                slug = f"tweet-{username}-{tweet['id'][-8:]}"
-                
-                # 创建文档
-                doc_result = self.create_document(
-                    title=title,
-                    body=content,
-                    slug=slug,
-                    format_type=doc_format,
-                    public=public
-                )
-                
-                if doc_result:
-                    results.append({
-                        'username': username,
-                        'tweet_id': tweet['id'],
-                        'doc_id': doc_result.get('id'),
-                        'doc_slug': doc_result.get('slug'),
-                        'doc_url': f"{self.base_url}/{self.namespace}/{doc_result.get('slug', '')}",
-                        'status': 'success'
-                    })
-                else:
-                    results.append({
-                        'username': username,
-                        'tweet_id': tweet['id'],
-                        'status': 'failed'
-                    })
-                
-                # 发布间隔，避免过快请求
-                time.sleep(1.5)  # 语雀API可能需要更长间隔
+                jobs.append((len(results), username, tweet, {
+                    'title': title,
+                    'body': content,
+                    'slug': f"tweet-{username}-{tweet_id[-8:]}",
+                    'format_type': doc_format,
+                    'public': public
+                }))
+                results.append(None)
                 
                 # 限制每个用户最多发布的推文数量
                 if i >= 4:  # 每个用户最多发布5条推文
                     print(f"⚠️ @{username} 推文数量较多，仅发布前5条")
                     break
         
+        if not jobs:
+            return results
+        
+        doc_results = self.create_documents([job[3] for job in jobs], max_workers=max_workers)
+        
+        for (index, username, tweet, doc), doc_result in zip(jobs, doc_results):
+            if doc_result:
+                existing_titles.add(doc['title'])
+                results[index] = {
+                    'username': username,
+                    'tweet_id': tweet['id'],
+                    'doc_id': doc_result.get('id'),
+                    'doc_slug': doc_result.get('slug'),
+                    'doc_url': f"{self.base_url}/{self.namespace}/{doc_result.get('slug', '')}",
+                    'status': 'success'
+                }
+            else:
+                results[index] = {
+                    'username': username,
+                    'tweet_id': tweet['id'],
+                    'status': 'failed'
+                }
+        
+        self.record_published(results)
+        
         return results
 
 
 class TwitterScraper:
+    # 批量查询用户信息时每次请求的最大用户名数（API上限）
+    USERS_LOOKUP_BATCH = 100
+    
+    # 每个用户最多获取的推文数
+    MAX_TWEETS_PER_USER = 1000
+    
     def __init__(self, bearer_token: str, api_tier: str = 'free', 
-                 safety_factor: float = 0.8, wordpress_config: Optional[Dict] = None):
+                 safety_factor: float = 0.8, wordpress_config: Optional[Dict] = None,
+                 max_workers: int = 4):
         """
         初始化Twitter爬虫
         
@@ -670,8 +1090,18 @@ class TwitterScraper:
             api_tier: API 计划等级 ('free', 'basic', 'pro', 'enterprise')
             safety_factor: 安全系数，降低实际请求频率以避免限制
             wordpress_config: WordPress配置字典 {'site_url': str, 'username': str, 'password': str}
+            max_workers: 并发获取用户推文的最大线程数，请求频率仍由速率限制管理器控制
         """
         self.client = tweepy.Client(bearer_token=bearer_token)
+        self.max_workers = max(1, max_workers)
+        
+        # tweepy 内部复用 self.client.session；线程数超过默认池大小(10)时扩大连接池，
+        # 避免连接被丢弃、重新握手（不小于默认值，线程少时也不缩小连接池）
+        twitter_adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max(requests.adapters.DEFAULT_POOLSIZE, self.max_workers)
+        )
+        self.client.session.mount('https://', twitter_adapter)
         
         # 初始化速率限制管理器
         try:
@@ -701,7 +1131,8 @@ class TwitterScraper:
                     self.yuque_publisher = YuquePublisher(
                         wordpress_config['yuque_token'],
                         wordpress_config['yuque_namespace'],
-                        wordpress_config.get('yuque_base_url', 'https://yuque-api.antfin-inc.com')
+                        wordpress_config.get('yuque_base_url', 'https://yuque-api.antfin-inc.com'),
+                        cache_path=wordpress_config.get('yuque_cache_path')
                     )
                     print("📝 语雀发布器初始化成功")
                 else:
@@ -727,6 +1158,27 @@ class TwitterScraper:
         """
         self.rate_manager.wait_for_rate_limit(endpoint)
     
+    @staticmethod
+    def _get_time_range(days: int = 1):
+        """
+        计算获取推文的时间范围（UTC，使用一天的开始和结束时间）
+        
+        Args:
+            days: 获取最近几天的推文
+            
+        Returns:
+            (start_time, end_time) 元组
+        """
+        today = datetime.now(_UTC).date()
+        end_time = datetime.combine(today, _END_OF_DAY, tzinfo=_UTC)
+        start_time = datetime.combine(today - timedelta(days=days-1), _START_OF_DAY, tzinfo=_UTC)
+        return start_time, end_time
+    
+    @staticmethod
+    def _format_time_range(start_time: datetime, end_time: datetime) -> str:
+        """格式化时间范围用于输出"""
+        return f"{start_time.strftime('%Y-%m-%d %H:%M')} 到 {end_time.strftime('%Y-%m-%d %H:%M')}"
+    
     def get_tweets(self, usernames, days: int = 1) -> Dict[str, List[Dict]]:
         """
         获取用户推文（独立处理模式）
@@ -739,35 +1191,60 @@ class TwitterScraper:
         Returns:
             字典，键为用户名，值为该用户的推文列表
         """
-        # 统一处理为列表格式
+        # 统一处理为列表格式（去重并保持原有顺序）
         if isinstance(usernames, str):
             usernames = [usernames]
+        usernames = list(dict.fromkeys(usernames))
         
-        all_tweets = {}
+        # 结果按输入顺序排列
+        all_tweets: Dict[str, List[Dict]] = {username: [] for username in usernames}
         total_users = len(usernames)
+        max_workers = min(self.max_workers, total_users) or 1
         
         print(f"🐦 开始获取 {total_users} 个用户的推文...")
         print("📊 模式: 独立处理（获取后立即发布到语雀）")
+        print(f"🧵 并发线程: {max_workers}")
         print()
         
-        for i, username in enumerate(usernames, 1):
-            print(f"\n[{i}/{total_users}] 正在处理用户: @{username}")
-            print("=" * 40)
-            
-            tweets = self._get_single_user_tweets(username, days)
-            all_tweets[username] = tweets
-            
-            # 立即处理当前用户的数据
-            if tweets:
-                self._process_user_tweets_individually(username, tweets)
-            else:
-                print(f"⚠️  @{username} 没有推文数据，跳过发布")
+        # 所有用户共用同一时间范围
+        start_time, end_time = self._get_time_range(days)
+        print(f"🗓️ 时间范围: {self._format_time_range(start_time, end_time)} (UTC)")
+        
+        # 批量查询用户ID，避免每个用户单独请求一次用户信息
+        user_ids = self._resolve_user_ids(usernames)
+        if user_ids is not None:
+            for username in usernames:
+                if username.lower() not in user_ids:
+                    print(f"用户 @{username} 不存在")
+            usernames = [username for username in usernames if username.lower() in user_ids]
+        
+        # 进度按实际需要获取推文的用户数计算（不含不存在的用户）
+        fetch_total = len(usernames)
+        
+        # 网络请求并发进行，每个请求都经过速率限制管理器，无需额外的用户间延迟
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    self._get_single_user_tweets, username, days, start_time, end_time,
+                    user_ids[username.lower()] if user_ids else None
+                ): username
+                for username in usernames
+            }
             
-            # 处理完一个用户后的额外延迟（避免连续请求）
-            if i < total_users:
-                extra_delay = self.rate_manager.get_recommended_delay('get_users_tweets') * 0.3
-                print(f"⏱️  用户间延迟: {extra_delay:.1f}秒")
-                time.sleep(extra_delay)
+            # 哪个用户先获取完成就先处理，不等待其他用户
+            for i, future in enumerate(as_completed(futures), 1):
+                username = futures[future]
+                print(f"\n[{i}/{fetch_total}] 正在处理用户: @{username}")
+                print("=" * 40)
+                
+                tweets = future.result()
+                all_tweets[username] = tweets
+                
+                # 立即处理当前用户的数据
+                if tweets:
+                    self._process_user_tweets_individually(username, tweets)
+                else:
+                    print(f"⚠️  @{username} 没有推文数据，跳过发布")
         
         return all_tweets
     
@@ -793,6 +1270,7 @@ class TwitterScraper:
             # 获取语雀配置（从环境变量或使用默认值）
             doc_format = os.getenv('YUQUE_DOC_FORMAT', 'markdown')
             doc_public = int(os.getenv('YUQUE_DOC_PUBLIC', '0'))
+            publish_workers = int(os.getenv('YUQUE_PUBLISH_WORKERS', '4'))
             
             try:
                 # 将单用户数据转换为字典格式供发布方法使用
@@ -803,14 +1281,16 @@ class TwitterScraper:
                         user_tweets_data,
                         doc_format=doc_format,
                         public=doc_public,
-                        avoid_duplicates=True
+                        avoid_duplicates=True,
+                        max_workers=publish_workers
                     )
                 else:
                     results = []
                 
                 if results:
-                    success_count = len([r for r in results if r['status'] == 'success'])
-                    failed_count = len([r for r in results if r['status'] == 'failed'])
+                    status_counts = Counter(r['status'] for r in results)
+                    success_count = status_counts['success']
+                    failed_count = status_counts['failed']
                     
                     print(f"✅ @{username} 语雀发布结果:")
                     print(f"   ✅ 成功: {success_count} 篇")
@@ -842,10 +1322,7 @@ class TwitterScraper:
             print(f"📊 @{username}: 无推文数据")
             return
         
-        total_tweets = len(tweets)
-        total_likes = sum(tweet['like_count'] for tweet in tweets)
-        total_retweets = sum(tweet['retweet_count'] for tweet in tweets)
-        total_replies = sum(tweet['reply_count'] for tweet in tweets)
+        total_tweets, total_likes, total_retweets, total_replies = _aggregate(tweets)
         
         print(f"\n📊 @{username} 的推文统计:")
         print(f"   📝 推文数: {total_tweets:,}")
@@ -866,77 +1343,126 @@ class TwitterScraper:
             print(f"       👍 {tweet['like_count']} | 🔄 {tweet['retweet_count']} | 💬 {tweet['reply_count']}")
             print(f"       🔗 {tweet['url']}")
     
-    def _get_single_user_tweets(self, username: str, days: int = 1) -> List[Dict]:
+    def _resolve_user_ids(self, usernames: List[str]) -> Optional[Dict[str, int]]:
+        """
+        批量查询用户ID（每次请求最多100个用户名）
+        
+        Args:
+            usernames: 用户名列表
+            
+        Returns:
+            字典，键为小写用户名，值为用户ID；查询失败时返回None
+        """
+        user_ids: Dict[str, int] = {}
+        
+        # 过滤 Twitter 不接受的用户名，避免一个无效名称导致整批查询失败
+        invalid = [username for username in usernames if not _TWITTER_HANDLE_RE.match(username)]
+        if invalid:
+            print(f"⚠️ 跳过无效的用户名: {', '.join('@' + u for u in invalid)}")
+            usernames = [username for username in usernames if _TWITTER_HANDLE_RE.match(username)]
+        
+        try:
+            for i in range(0, len(usernames), self.USERS_LOOKUP_BATCH):
+                chunk = usernames[i:i + self.USERS_LOOKUP_BATCH]
+                
+                # 频次限制控制 - 批量查询用户信息
+                self.rate_manager.wait_for_rate_limit('get_users')
+                
+                print(f"🔍 正在批量查询 {len(chunk)} 个用户的信息...")
+                users_response = self.client.get_users(usernames=chunk)
+                
+                for user in users_response.data or []:  # type: ignore
+                    user_ids[user.username.lower()] = user.id
+                    print(f"找到用户: {user.name} (@{user.username})")
+            
+            # 重置重试计数（成功获取用户信息）
+            self.rate_manager.reset_retry_attempts('get_users')
+            return user_ids
+            
+        except Exception as e:
+            print(f"⚠️ 批量查询用户信息失败，将逐个查询 - {str(e)}")
+            return None
+    
+    def _get_single_user_tweets(self, username: str, days: int = 1,
+                                start_time: Optional[datetime] = None,
+                                end_time: Optional[datetime] = None,
+                                user_id: Optional[int] = None) -> List[Dict]:
         """
         获取单个用户的推文
         
         Args:
             username: Twitter用户名（不包含@符号）
             days: 获取最近几天的推文，默认1天
+            start_time: 开始时间（UTC），与end_time同时提供时忽略days
+            end_time: 结束时间（UTC）
+            user_id: 已查询到的用户ID，提供时跳过用户信息查询
             
         Returns:
             推文列表，每个推文包含详细信息
         """
         try:
-            # 频次限制控制 - 查询用户信息
-            self._wait_for_rate_limit('get_user')
-            
-            # 获取用户信息
-            print(f"🔍 正在查询用户 @{username} 的信息...")
-            user_response = self.client.get_user(username=username)
-            
-            # 注意：tweepy的Response对象可能不直接提供响应头，这里先跳过处理
-            
-            if not user_response or not hasattr(user_response, 'data') or not user_response.data:  # type: ignore
-                print(f"用户 @{username} 不存在")
-                return []
-            
-            user = user_response.data  # type: ignore
-            user_id = user.id
-            print(f"找到用户: {user.name} (@{username})")
-            
-            # 重置重试计数（成功获取用户信息）
-            self.rate_manager.reset_retry_attempts('get_user')
+            if user_id is None:
+                # 频次限制控制 - 查询用户信息
+                self.rate_manager.wait_for('get_user', self.rate_manager.rl_get_user)
+                
+                # 获取用户信息
+                print(f"🔍 正在查询用户 @{username} 的信息...")
+                user_response = self.client.get_user(username=username)
+                
+                # 注意：tweepy的Response对象可能不直接提供响应头，这里先跳过处理
+                
+                if not user_response or not hasattr(user_response, 'data') or not user_response.data:  # type: ignore
+                    print(f"用户 @{username} 不存在")
+                    return []
+                
+                user = user_response.data  # type: ignore
+                user_id = user.id
+                print(f"找到用户: {user.name} (@{username})")
+                
+                # 重置重试计数（成功获取用户信息）
+                self.rate_manager.reset_retry_attempts('get_user')
             
             # 计算时间范围（使用一天的开始和结束时间）
-            end_time = datetime.now().replace(hour=23, minute=59, second=59, microsecond=999999)
-            start_time = (end_time - timedelta(days=days-1)).replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            print(f"正在获取 {start_time.strftime('%Y-%m-%d %H:%M')} 到 {end_time.strftime('%Y-%m-%d %H:%M')} 的推文...")
-            
-            # 频次限制控制 - 获取推文
-            self._wait_for_rate_limit('get_users_tweets')
+            # （由 get_tweets 统一传入时已在开始时输出过一次）
+            if start_time is None or end_time is None:
+                start_time, end_time = self._get_time_range(days)
+                print(f"正在获取 {self._format_time_range(start_time, end_time)} 的推文...")
             
-            # 获取推文
+            # 获取推文（手动翻页，每一页请求前都进行频次限制控制）
             print(f"📡 正在请求 @{username} 的推文数据...")
-            tweets_response = tweepy.Paginator(
-                self.client.get_users_tweets,
-                id=user_id,
-                start_time=start_time,
-                end_time=end_time,
-                tweet_fields=['created_at', 'public_metrics', 'context_annotations', 'lang', 'reply_settings'],
-                user_fields=['name', 'username', 'verified', 'public_metrics'],
-                expansions=['author_id'],
-                max_results=100
-            ).flatten(limit=1000)
-            
-            # 处理响应头信息（对于tweepy.Paginator，需要特殊处理）
-            # 注意：tweepy.Paginator可能不直接提供响应头，这里可以优化
+            tweets = []
+            pagination_token = None
+            while True:
+                self.rate_manager.wait_for('get_users_tweets', self.rate_manager.rl_get_users_tweets)
+                response = self.client.get_users_tweets(
+                    id=user_id,
+                    start_time=start_time,
+                    end_time=end_time,
+                    tweet_fields=_TWEET_FIELDS,
+                    max_results=100,
+                    pagination_token=pagination_token
+                )
+                tweets.extend(response.data or [])  # type: ignore
+                
+                pagination_token = (response.meta or {}).get('next_token')  # type: ignore
+                if not pagination_token or len(tweets) >= self.MAX_TWEETS_PER_USER:
+                    break
             
-            tweet_list = []
-            for tweet in tweets_response:
-                tweet_data = {
+            url_prefix = f"https://twitter.com/{username}/status/"
+            tweet_list = [
+                {
                     'id': tweet.id,
                     'text': tweet.text,
-                    'created_at': tweet.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                    'created_at': tweet.created_at.isoformat(' ', 'seconds')[:_TIMESTAMP_LEN],
                     'retweet_count': tweet.public_metrics['retweet_count'],
                     'like_count': tweet.public_metrics['like_count'],
                     'reply_count': tweet.public_metrics['reply_count'],
                     'quote_count': tweet.public_metrics['quote_count'],
                     'language': tweet.lang,
-                    'url': f"https://twitter.com/{username}/status/{tweet.id}"
+                    'url': url_prefix + str(tweet.id)
                 }
-                tweet_list.append(tweet_data)
+                for tweet in tweets[:self.MAX_TWEETS_PER_USER]
+            ]
             
             # 重置重试计数（成功获取推文）
             self.rate_manager.reset_retry_attempts('get_users_tweets')
@@ -989,10 +1515,7 @@ class TwitterScraper:
                 print("没有推文数据")
                 return
             
-            total_tweets = len(tweets)
-            total_likes = sum(tweet['like_count'] for tweet in tweets)
-            total_retweets = sum(tweet['retweet_count'] for tweet in tweets)
-            total_replies = sum(tweet['reply_count'] for tweet in tweets)
+            total_tweets, total_likes, total_retweets, total_replies = _aggregate(tweets)
             
             print("\n=== 推文统计摘要 ===")
             print(f"总推文数: {total_tweets}")
@@ -1012,29 +1535,23 @@ class TwitterScraper:
             print("="*50)
             
             total_users = len(all_tweets)
-            total_tweets_all = 0
-            total_likes_all = 0
-            total_retweets_all = 0
-            total_replies_all = 0
+            total_tweets_all = total_likes_all = total_retweets_all = total_replies_all = 0
             
             print(f"\n📊 用户数量: {total_users}")
             print("\n📈 各用户统计:")
             
+            # 每个用户的推文只遍历一次，总计在同一循环中累加
             for username, tweets in all_tweets.items():
-                tweet_count = len(tweets)
+                tweet_count, likes, retweets, replies = _aggregate(tweets)
                 total_tweets_all += tweet_count
+                total_likes_all += likes
+                total_retweets_all += retweets
+                total_replies_all += replies
                 
                 if tweets:
-                    likes = sum(tweet['like_count'] for tweet in tweets)
-                    retweets = sum(tweet['retweet_count'] for tweet in tweets)
-                    replies = sum(tweet['reply_count'] for tweet in tweets)
-                    
-                    total_likes_all += likes
-                    total_retweets_all += retweets
-                    total_replies_all += replies
-                    
                     print(f"  @{username}:")
-                    print(f"    推文: {tweet_count:,} | 点赞: {likes:,} | 转发: {retweets:,} | 回复: {replies:,}")
+                    print(f"    推文: {tweet_count:,} | 点赞: {likes:,} | "
+                          f"转发: {retweets:,} | 回复: {replies:,}")
                 else:
                     print(f"  @{username}: 无推文数据")
             
@@ -1069,22 +1586,24 @@ def load_users_from_config(config_file: str = 'config/users_config.txt') -> List
     
     try:
         with open(config_file, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                # 去除首尾空白字符
-                line = line.strip()
-                
-                # 忽略空行和注释行
-                if not line or line.startswith('#'):
-                    continue
-                
-                # 移除@符号（如果用户添加了）
-                username = line.lstrip('@')
-                
-                # 验证用户名格式（简单验证）
-                if username and username.replace('_', '').replace('.', '').isalnum():
-                    users.append(username)
-                else:
-                    print(f"警告: 第{line_num}行的用户名格式可能不正确: {line}")
+            lines = f.read().splitlines()
+        
+        for line_num, line in enumerate(lines, 1):
+            # 去除首尾空白字符
+            line = line.strip()
+            
+            # 忽略空行和注释行
+            if not line or line[0] == '#':
+                continue
+            
+            # 移除@符号（如果用户添加了）
+            username = line.lstrip('@')
+            
+            # 验证用户名格式（简单验证）
+            if _USERNAME_RE.match(username):
+                users.append(username)
+            else:
+                print(f"警告: 第{line_num}行的用户名格式可能不正确: {line}")
         
         print(f"从配置文件 {config_file} 中加载了 {len(users)} 个用户")
         if users:
@@ -1107,6 +1626,7 @@ def main():
     # 新的速率限制配置
     API_TIER = os.getenv('TWITTER_API_TIER', 'free').lower()  # API等级
     SAFETY_FACTOR = float(os.getenv('TWITTER_SAFETY_FACTOR', '0.8'))  # 安全系数
+    CONCURRENCY = int(os.getenv('TWITTER_CONCURRENCY', '4'))  # 并发获取用户数
     
     # 向后兼容的配置（已弃用但仍支持）
     RATE_LIMIT_DELAY = float(os.getenv('TWITTER_RATE_DELAY', '10.0'))  # 频次限制延迟（秒），默认10秒
@@ -1115,6 +1635,7 @@ def main():
     YUQUE_TOKEN = os.getenv('YUQUE_TOKEN')  # 语雀API Token
     YUQUE_NAMESPACE = os.getenv('YUQUE_NAMESPACE')  # 语雀知识库命名空间
     YUQUE_BASE_URL = os.getenv('YUQUE_BASE_URL', 'https://yuque-api.antfin-inc.com')  # 语雀API基础URL
+    YUQUE_CACHE_PATH = os.getenv('YUQUE_CACHE_PATH')  # 已发布推文记录（sqlite文件，可选）
     
     # 语雀发布设置
     PUBLISH_TO_YUQUE = os.getenv('PUBLISH_TO_YUQUE', 'true').lower() == 'true'
@@ -1141,6 +1662,7 @@ def main():
     print(f"\n🔧 环境变量说明:")
     print(f"   TWITTER_API_TIER={API_TIER} (free/basic/pro/enterprise)")
     print(f"   TWITTER_SAFETY_FACTOR={SAFETY_FACTOR} (0.1-1.0, 推荐0.8)")
+    print(f"   TWITTER_CONCURRENCY={CONCURRENCY} (并发获取用户数)")
     
     # 语雀配置检查
     yuque_config = None
@@ -1149,13 +1671,16 @@ def main():
             yuque_config = {
                 'yuque_token': YUQUE_TOKEN,
                 'yuque_namespace': YUQUE_NAMESPACE,
-                'yuque_base_url': YUQUE_BASE_URL
+                'yuque_base_url': YUQUE_BASE_URL,
+                'yuque_cache_path': YUQUE_CACHE_PATH
             }
             print(f"\n📝 语雀发布已启用")
             print(f"  🌐 API地址: {YUQUE_BASE_URL}")
             print(f"  📚 知识库: {YUQUE_NAMESPACE}")
             print(f"  📄 格式: {YUQUE_DOC_FORMAT}")
             print(f"  🔒 公开性: {'公开' if YUQUE_DOC_PUBLIC else '私密'}")
+            if YUQUE_CACHE_PATH:
+                print(f"  🗂️ 发布记录: {YUQUE_CACHE_PATH}")
         else:
             print("\n⚠️ 语雀配置不完整，将跳过语雀发布")
             print("💡 需要设置: YUQUE_TOKEN, YUQUE_NAMESPACE")
@@ -1190,6 +1715,7 @@ def main():
         print("  export YUQUE_BASE_URL=https://yuque-api.antfin-inc.com")
         print("  export YUQUE_DOC_FORMAT=markdown")
         print("  export YUQUE_DOC_PUBLIC=0")
+        print("  export YUQUE_CACHE_PATH=~/.twitter_scraper/cache.sqlite  # 可选，跳过已发布推文")
         print("\n👥 用户配置说明:")
         print("请编辑 config/users_config.txt 文件来修改要爬取的用户名列表")
         print("每行一个用户名，以#开头的行为注释")
@@ -1205,7 +1731,8 @@ def main():
         BEARER_TOKEN, 
         api_tier=API_TIER,
         safety_factor=SAFETY_FACTOR,
-        wordpress_config=yuque_config  # 使用语雀配置
+        wordpress_config=yuque_config,  # 使用语雀配置
+        max_workers=CONCURRENCY
     )
     
     # 显示目标信息
@@ -1217,7 +1744,7 @@ def main():
     # 爬取推文（使用独立处理模式）
     all_tweets = scraper.get_tweets(USERNAMES, DAYS)
     
-    if any(tweets for tweets in all_tweets.values()):
+    if any(all_tweets.values()):
         print(f"\n" + "=" * 60)
         print("🎉 所有用户处理完成!")
         print("=" * 60)
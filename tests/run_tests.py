@@ -12,12 +12,18 @@ import unittest
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# 单元测试模块清单（显式列出，避免目录扫描时导入需要外部服务的集成测试脚本）
+TEST_MODULES = (
+    'tests.test_rate_limit_manager',
+    'tests.test_yuque_publisher_unit',
+)
+
 def run_all_tests():
     """运行所有测试"""
-    # 发现并运行所有测试
     loader = unittest.TestLoader()
-    start_dir = os.path.dirname(__file__)
-    suite = loader.discover(start_dir, pattern='test_*.py')
+    suite = unittest.TestSuite()
+    for module_name in TEST_MODULES:
+        suite.addTests(loader.loadTestsFromName(module_name))
     
     runner = unittest.TextTestRunner(verbosity=2)
     result = runner.run(suite)
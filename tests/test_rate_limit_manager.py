@@ -4,9 +4,13 @@
 Twitter API v2 速率限制管理器测试
 """
 
+import io
 import os
 import sys
+import tempfile
 import unittest
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
 # 添加src目录到路径
@@ -17,8 +21,11 @@ try:
         TwitterAPITier,
         RateLimit, 
         TwitterRateLimitManager,
-        TwitterScraper
+        TwitterScraper,
+        _aggregate,
+        load_users_from_config
     )
+    import tweepy
 except ImportError as e:
     print(f"导入错误: {e}")
     print("请确保已安装所需依赖: pip install tweepy requests")
@@ -72,6 +79,15 @@ class TestTwitterRateLimitManager(unittest.TestCase):
         self.assertEqual(unknown_limit.requests_per_window, 1)
         self.assertEqual(unknown_limit.window_minutes, 15)
     
+    def test_precomputed_rate_limits(self):
+        """测试初始化时预解析的端点配置"""
+        self.assertIs(self.manager.rl_get_user, self.manager.get_rate_limit('get_user'))
+        self.assertIs(self.manager.rl_get_users_tweets, self.manager.get_rate_limit('get_users_tweets'))
+
+        # ENTERPRISE 未配置端点限制，应回退到默认限制
+        manager = TwitterRateLimitManager(api_tier=TwitterAPITier.ENTERPRISE, enable_monitoring=False)
+        self.assertIs(manager.rl_get_user, TwitterRateLimitManager.DEFAULT_RATE_LIMIT)
+
     def test_recommended_delay(self):
         """测试推荐延迟计算"""
         delay = self.manager.get_recommended_delay('get_users_tweets')
@@ -98,6 +114,57 @@ class TestTwitterRateLimitManager(unittest.TestCase):
         # 第二次请求应该也不等待（因为时间间隔足够）
         self.manager.wait_for_rate_limit('get_users_tweets')
         # 由于safety_factor的存在，可能会有短暂等待，但不会报错
+    
+    def test_wait_for_reserves_slots_and_sleeps_outside_lock(self):
+        """测试窗口已满时预约后续时间片，且等待期间不持有锁"""
+        manager = TwitterRateLimitManager(safety_factor=1.0, enable_monitoring=False)
+        rate_limit = RateLimit(2, 1)
+        waits = []
+        
+        def fake_sleep(seconds):
+            self.assertFalse(manager._lock.locked())
+            waits.append(seconds)
+        
+        with patch('time.sleep', side_effect=fake_sleep):
+            for _ in range(4):
+                manager.wait_for('test_endpoint', rate_limit)
+        
+        # 前两次直接发出，后两次各自预约到对应请求过期之后
+        self.assertEqual(len(waits), 2)
+        for wait_time in waits:
+            self.assertAlmostEqual(wait_time, 60, delta=1)
+        self.assertEqual(len(manager.request_history['test_endpoint']), 4)
+    
+    def test_rate_limit_exceeded_pushes_back_all_workers(self):
+        """测试收到429后共享的请求时间表整体后移，其他线程一起退避"""
+        manager = TwitterRateLimitManager(api_tier=TwitterAPITier.PRO, enable_monitoring=False)
+        rate_limit = manager.get_rate_limit('get_users_tweets')
+        
+        with patch('time.sleep') as mock_sleep:
+            manager.handle_rate_limit_exceeded('get_users_tweets', retry_after=30)
+            mock_sleep.reset_mock()
+            # 配额远未用完，但仍需等到服务器要求的恢复时间之后
+            manager.wait_for('get_users_tweets', rate_limit)
+        
+        mock_sleep.assert_called_once()
+        self.assertAlmostEqual(mock_sleep.call_args.args[0], 30, delta=1)
+    
+    def test_rate_limit_exceeded_does_not_consume_quota(self):
+        """测试429后的恢复时间不占用低配额层级（FREE/BASIC）的请求配额"""
+        for tier in (TwitterAPITier.FREE, TwitterAPITier.BASIC):
+            with self.subTest(tier=tier):
+                manager = TwitterRateLimitManager(api_tier=tier, enable_monitoring=False)
+                rate_limit = manager.get_rate_limit('get_users_tweets')
+                
+                with patch('time.sleep') as mock_sleep:
+                    manager.handle_rate_limit_exceeded('get_users_tweets', retry_after=900)
+                    mock_sleep.reset_mock()
+                    manager.wait_for('get_users_tweets', rate_limit)
+                
+                # 只等待服务器要求的900秒，而不是再额外等待一个窗口
+                mock_sleep.assert_called_once()
+                self.assertAlmostEqual(mock_sleep.call_args.args[0], 900, delta=1)
+                self.assertEqual(len(manager.request_history['get_users_tweets']), 1)
 
 
 class TestTwitterScraperIntegration(unittest.TestCase):
@@ -133,6 +200,112 @@ class TestTwitterScraperIntegration(unittest.TestCase):
         # 应该回退到FREE等级
         self.assertEqual(scraper.rate_manager.api_tier, TwitterAPITier.FREE)
 
+    def test_get_tweets_concurrent_keeps_input_order(self):
+        """测试并发获取时结果仍按输入顺序排列"""
+        scraper = TwitterScraper(bearer_token="fake_token_for_testing", max_workers=3)
+
+        with patch.object(scraper, '_resolve_user_ids', return_value=None), \
+             patch.object(scraper, '_get_single_user_tweets', return_value=[]) as mock_fetch:
+            result = scraper.get_tweets(['alice', 'bob', 'carol', 'alice'])
+
+        self.assertEqual(list(result), ['alice', 'bob', 'carol'])
+        self.assertEqual(mock_fetch.call_count, 3)
+
+    def test_get_tweets_resolves_user_ids_in_one_request(self):
+        """测试批量查询用户ID后直接获取推文"""
+        scraper = TwitterScraper(bearer_token="fake_token_for_testing", api_tier='pro')
+        users = [MagicMock(id=1, username='Alice'), MagicMock(id=2, username='bob')]
+        scraper.client = MagicMock()
+        scraper.client.get_users.return_value = tweepy.Response(users, {}, [], {})
+
+        output = io.StringIO()
+        with patch.object(scraper, '_get_single_user_tweets', return_value=[]) as mock_fetch, \
+             redirect_stdout(output):
+            result = scraper.get_tweets(['alice', 'bob', 'ghost'])
+
+        # 不存在的用户不计入进度
+        self.assertIn('[2/2]', output.getvalue())
+        self.assertNotIn('/3]', output.getvalue())
+        scraper.client.get_users.assert_called_once_with(usernames=['alice', 'bob', 'ghost'])
+        scraper.client.get_user.assert_not_called()
+        self.assertEqual(sorted(call.args[-1] for call in mock_fetch.call_args_list), [1, 2])
+        self.assertEqual(result['ghost'], [])
+
+    def test_invalid_usernames_are_not_sent_in_batch(self):
+        """测试Twitter不接受的用户名不会放进批量查询，其余用户正常查询"""
+        scraper = TwitterScraper(bearer_token="fake_token_for_testing", api_tier='pro')
+        scraper.client = MagicMock()
+        scraper.client.get_users.return_value = tweepy.Response(
+            [MagicMock(id=1, username='alice')], {}, [], {})
+
+        with redirect_stdout(io.StringIO()):
+            user_ids = scraper._resolve_user_ids(['alice', 'bad.name'])
+
+        scraper.client.get_users.assert_called_once_with(usernames=['alice'])
+        self.assertEqual(user_ids, {'alice': 1})
+
+    def test_pagination_gates_every_page(self):
+        """测试手动翻页时每一页请求前都经过速率限制"""
+        def make_tweet(tweet_id):
+            return MagicMock(
+                id=tweet_id, text=f'tweet {tweet_id}', lang='en',
+                created_at=datetime(2024, 1, 15, 10, 30, tzinfo=timezone.utc),
+                public_metrics={'retweet_count': 1, 'like_count': 2, 'reply_count': 3, 'quote_count': 4}
+            )
+
+        pages = {
+            None: tweepy.Response([make_tweet(1), make_tweet(2)], {}, [], {'next_token': 'page2'}),
+            'page2': tweepy.Response([make_tweet(3)], {}, [], {}),
+        }
+        scraper = TwitterScraper(bearer_token="fake_token_for_testing", api_tier='pro')
+        scraper.client = MagicMock()
+        scraper.client.get_users_tweets.side_effect = lambda pagination_token=None, **kwargs: pages[pagination_token]
+
+        with patch.object(scraper.rate_manager, 'wait_for') as mock_wait:
+            tweets = scraper._get_single_user_tweets('testuser', user_id=42)
+
+        self.assertEqual([t['id'] for t in tweets], [1, 2, 3])
+        self.assertEqual(tweets[0]['created_at'], '2024-01-15 10:30:00')
+        self.assertEqual(tweets[0]['url'], 'https://twitter.com/testuser/status/1')
+        self.assertEqual(mock_wait.call_count, 2)
+        self.assertEqual(scraper.client.get_users_tweets.call_count, 2)
+
+    def test_time_range_is_utc_day_bounds(self):
+        """测试时间范围为带时区的UTC整日边界"""
+        start_time, end_time = TwitterScraper._get_time_range(days=3)
+
+        self.assertEqual(start_time.tzinfo, timezone.utc)
+        self.assertEqual(end_time.tzinfo, timezone.utc)
+        self.assertEqual((start_time.hour, start_time.minute, start_time.second), (0, 0, 0))
+        self.assertEqual((end_time.hour, end_time.minute, end_time.second), (23, 59, 59))
+        self.assertEqual((end_time.date() - start_time.date()).days, 2)
+
+
+class TestLoadUsersFromConfig(unittest.TestCase):
+    """用户配置文件加载测试"""
+
+    def test_load_users_from_config(self):
+        """测试用户配置文件解析与用户名校验"""
+        content = "# 注释\n\nelonmusk\n@sama\n  paul.g_1  \nbad name\nthis_name_is_too_long\n"
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as f:
+            f.write(content)
+        self.addCleanup(os.remove, f.name)
+
+        self.assertEqual(load_users_from_config(f.name), ['elonmusk', 'sama', 'paul.g_1'])
+
+
+class TestAggregate(unittest.TestCase):
+    """统计摘要指标汇总测试"""
+
+    def test_aggregate(self):
+        """测试单次遍历汇总推文数、点赞、转发与回复"""
+        tweets = [
+            {'like_count': 3, 'retweet_count': 1, 'reply_count': 0, 'quote_count': 2},
+            {'like_count': 4, 'retweet_count': 5, 'reply_count': 6, 'quote_count': 0},
+        ]
+        self.assertEqual(_aggregate(tweets), (2, 7, 6, 6))
+        self.assertEqual(_aggregate([]), (0, 0, 0, 0))
+
 
 def demonstrate_rate_limits():
     """演示不同API等级的速率限制配置"""
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+语雀发布器单元测试（离线运行，不访问语雀API）
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import requests
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.twitter_scraper import YuquePublisher, _RATE_LIMITED
+
+
+def make_tweet(tweet_id: int, text: str = 'tweet') -> dict:
+    """构造测试用推文数据"""
+    return {
+        'id': tweet_id, 'text': text, 'created_at': '2024-01-15 10:30:00',
+        'like_count': 0, 'retweet_count': 0, 'reply_count': 0, 'quote_count': 0,
+        'language': 'en', 'url': f'https://twitter.com/testuser/status/{tweet_id}'
+    }
+
+
+def make_response(status_code: int, body: bytes = b'{}', headers=None) -> requests.Response:
+    """构造测试用HTTP响应"""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    response.headers.update(headers or {})
+    return response
+
+
+class TestYuqueFormatting(unittest.TestCase):
+    """推文格式化测试"""
+
+    def setUp(self):
+        self.publisher = YuquePublisher('test', 'test/test')
+        self.addCleanup(self.publisher.close)
+
+    def test_html_formatting_escapes_tweet_text(self):
+        """测试HTML格式化会转义推文内容且不重复转义API实体"""
+        tweet = make_tweet(1234567890123456789, '<script>alert(1)</script> A &amp; B\nline2')
+        html_content = self.publisher.format_tweet_as_html(tweet, 'testuser', include_css=False)
+
+        self.assertNotIn('<script>', html_content)
+        self.assertIn('&lt;script&gt;alert(1)&lt;/script&gt; A &amp; B<br>line2', html_content)
+        self.assertNotIn('<style>', html_content)
+
+
+class TestYuqueRequests(unittest.TestCase):
+    """语雀请求处理测试"""
+
+    def setUp(self):
+        self.publisher = YuquePublisher('test', 'test/test')
+        self.addCleanup(self.publisher.close)
+
+    def test_network_errors_are_handled(self):
+        """测试网络异常返回失败结果，而程序错误不会被吞掉"""
+        publisher = self.publisher
+        with patch.object(publisher.session, 'post', side_effect=requests.ConnectionError('boom')):
+            self.assertIsNone(publisher.create_document('title', 'body'))
+        with patch.object(publisher.session, 'get', side_effect=requests.Timeout('slow')):
+            self.assertEqual(publisher.get_documents(), [])
+            self.assertFalse(publisher.test_connection())
+        with patch.object(publisher.session, 'post', side_effect=TypeError('bug')):
+            with self.assertRaises(TypeError):
+                publisher.create_document('title', 'body')
+
+    def test_create_interval_adapts_to_429(self):
+        """测试收到429后放大创建间隔，成功后逐步回落"""
+        publisher = self.publisher
+        limited = make_response(429, headers={'Retry-After': '5'})
+        created = make_response(200, b'{"data": {"id": 1, "title": "doc"}}')
+
+        with patch.object(publisher.session, 'post', return_value=limited):
+            self.assertIsNone(publisher.create_document('doc', 'body'))
+        self.assertEqual(publisher._create_interval, 5.0)
+
+        with patch.object(publisher.session, 'post', return_value=created):
+            self.assertEqual(publisher.create_document('doc', 'body')['id'], 1)
+        self.assertEqual(publisher._create_interval, 2.5)
+
+    def test_connection_result_is_cached(self):
+        """测试连接成功后短时间内重复检查不再发起请求"""
+        publisher = self.publisher
+        with patch.object(publisher, '_check_connection', return_value=True) as mock_check:
+            self.assertTrue(publisher.test_connection())
+            self.assertTrue(publisher.test_connection())
+            mock_check.assert_called_once()
+
+            self.assertTrue(publisher.test_connection(force=True))
+            self.assertEqual(mock_check.call_count, 2)
+
+        # 失败结果不缓存
+        publisher._connection_ok_time = 0.0
+        with patch.object(publisher, '_check_connection', return_value=False) as mock_check:
+            self.assertFalse(publisher.test_connection())
+            self.assertFalse(publisher.test_connection())
+            self.assertEqual(mock_check.call_count, 2)
+
+    def test_repo_access_result_expires(self):
+        """测试知识库访问结果超过缓存有效期后重新检查"""
+        publisher = self.publisher
+        repo = make_response(200, b'{"data": {"name": "repo"}}')
+
+        with patch.object(publisher.session, 'get', return_value=repo) as mock_get:
+            self.assertTrue(publisher._test_repo_access())
+            self.assertTrue(publisher._test_repo_access())
+            mock_get.assert_called_once()
+
+            publisher._repo_access_ok_time -= publisher.CONNECTION_CACHE_TTL
+            self.assertTrue(publisher._test_repo_access())
+            self.assertEqual(mock_get.call_count, 2)
+
+
+class TestYuqueDocumentIndex(unittest.TestCase):
+    """文档标题索引与去重测试"""
+
+    def setUp(self):
+        self.publisher = YuquePublisher('test', 'test/test')
+        self.addCleanup(self.publisher.close)
+
+    def test_document_titles_read_every_page(self):
+        """测试文档标题索引会分页读取全部文档"""
+        page_size = self.publisher.DOCUMENT_PAGE_SIZE
+        pages = {
+            0: [{'title': f'doc-{i}'} for i in range(page_size)],
+            page_size: [{'title': 'last-doc'}],
+        }
+
+        with patch.object(self.publisher, 'get_documents',
+                          side_effect=lambda offset=0: pages[offset]) as mock_docs:
+            titles = self.publisher.get_document_titles()
+
+        self.assertEqual(mock_docs.call_count, 2)
+        self.assertEqual(len(titles), page_size + 1)
+        self.assertIn('last-doc', titles)
+
+    def test_check_document_exists_uses_title_index(self):
+        """测试逐条检查文档是否存在时复用缓存的标题集合"""
+        with patch.object(self.publisher, 'get_documents',
+                          return_value=[{'title': 'a'}, {'title': 'b'}]) as mock_docs:
+            self.assertTrue(self.publisher.check_document_exists('a'))
+            self.assertTrue(self.publisher.check_document_exists('b'))
+            self.assertFalse(self.publisher.check_document_exists('c'))
+
+        mock_docs.assert_called_once()
+
+    def test_created_document_is_visible_to_title_check(self):
+        """测试直接创建的文档在标题缓存有效期内也能被检查到"""
+        publisher = self.publisher
+        created = make_response(200, b'{"data": {"id": 1, "title": "new-doc"}}')
+
+        with patch.object(publisher, 'get_documents', return_value=[{'title': 'a'}]) as mock_docs, \
+             patch.object(publisher.session, 'post', return_value=created):
+            self.assertFalse(publisher.check_document_exists('new-doc'))
+            self.assertEqual(publisher.create_document('new-doc', 'body')['id'], 1)
+            self.assertTrue(publisher.check_document_exists('new-doc'))
+
+        mock_docs.assert_called_once()
+
+    def test_duplicate_check_fetches_documents_once(self):
+        """测试去重检查只获取一次文档列表并在多次发布间复用"""
+        publisher = self.publisher
+        tweets = [make_tweet(1234567890123456780 + i, f'tweet {i}') for i in range(3)]
+        existing_title = f"@testuser 的推文 - 2024-01-15 - {str(tweets[0]['id'])[-8:]}"
+
+        with patch.object(publisher, 'get_documents', return_value=[{'title': existing_title}]) as mock_docs, \
+             patch.object(publisher, '_create_document', return_value={'id': 1, 'slug': 'doc'}) as mock_create, \
+             patch('time.sleep'):
+            results = publisher.publish_tweets_as_documents({'testuser': tweets})
+
+        self.assertEqual(mock_docs.call_count, 1)
+        self.assertEqual(mock_create.call_count, 2)
+        self.assertEqual([r['status'] for r in results], ['skipped', 'success', 'success'])
+
+        # 再次发布时使用缓存的标题集合，已发布的推文全部跳过
+        with patch.object(publisher, 'get_documents', return_value=[]) as mock_docs, \
+             patch.object(publisher, '_create_document') as mock_create:
+            results = publisher.publish_tweets_as_documents({'testuser': tweets})
+
+        mock_docs.assert_not_called()
+        mock_create.assert_not_called()
+        self.assertEqual([r['status'] for r in results], ['skipped', 'skipped', 'skipped'])
+
+    def test_publish_cache_skips_published_tweets(self):
+        """测试已发布记录在重复运行时跳过已发布的推文"""
+        tweet = make_tweet(1234567890123456789)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, 'cache.sqlite')
+
+            # 第一次运行：发布并记录
+            publisher = YuquePublisher('test', 'test/test', cache_path=cache_path)
+            with patch.object(publisher, 'get_documents', return_value=[]), \
+                 patch.object(publisher, '_create_document', return_value={'id': 42, 'slug': 'doc'}), \
+                 patch('time.sleep'):
+                results = publisher.publish_tweets_as_documents({'testuser': [tweet]})
+            self.assertEqual(results[0]['status'], 'success')
+            publisher.close()
+
+            # 第二次运行（新实例）：直接跳过
+            publisher = YuquePublisher('test', 'test/test', cache_path=cache_path)
+            with patch.object(publisher, 'get_documents', return_value=[]), \
+                 patch.object(publisher, '_create_document') as mock_create:
+                results = publisher.publish_tweets_as_documents({'testuser': [tweet]})
+            publisher.close()
+
+        mock_create.assert_not_called()
+        self.assertEqual(results[0]['reason'], 'already_published')
+
+
+class TestYuqueBulkCreate(unittest.TestCase):
+    """批量并发创建文档测试"""
+
+    def setUp(self):
+        self.publisher = YuquePublisher('test', 'test/test')
+        self.addCleanup(self.publisher.close)
+
+    def test_create_documents_keeps_order(self):
+        """测试批量并发创建文档时结果与输入顺序一致"""
+        docs = [{'title': f'doc-{i}', 'body': 'body'} for i in range(6)]
+
+        def fake_create(title, body, **kwargs):
+            # 倒序制造不同的完成时间
+            time.sleep(0.01 * (6 - int(title.split('-')[1])))
+            return None if title == 'doc-3' else {'id': title, 'slug': title}
+
+        with patch.object(self.publisher, '_create_document', side_effect=fake_create):
+            results = self.publisher.create_documents(docs, max_workers=3, interval=0)
+
+        self.assertEqual([r and r['id'] for r in results],
+                         ['doc-0', 'doc-1', 'doc-2', None, 'doc-4', 'doc-5'])
+
+    def test_create_documents_shares_throttle(self):
+        """测试并发创建文档时所有线程共享同一个节流间隔"""
+        docs = [{'title': f'doc-{i}', 'body': 'body'} for i in range(4)]
+
+        with patch.object(self.publisher, '_create_document', return_value={'id': 1}), \
+             patch('time.sleep') as mock_sleep:
+            self.publisher.create_documents(docs, max_workers=4, interval=1.0)
+
+        # 第一次创建无需等待，之后依次预约 1s、2s、3s 后的时间片
+        waits = sorted(call.args[0] for call in mock_sleep.call_args_list)
+        self.assertEqual(len(waits), 3)
+        for expected, actual in zip((1.0, 2.0, 3.0), waits):
+            self.assertAlmostEqual(actual, expected, delta=0.1)
+
+    def test_rate_limited_documents_are_resubmitted(self):
+        """测试被限流（429）的文档在退避后重新提交，多次被限流才记为失败"""
+        docs = [{'title': 'doc-0', 'body': 'body'}, {'title': 'doc-1', 'body': 'body'}]
+        attempts = {'doc-0': 0, 'doc-1': 0}
+
+        def fake_create(title, body, **kwargs):
+            attempts[title] += 1
+            # doc-0 第一次被限流后成功；doc-1 一直被限流
+            if title == 'doc-1' or attempts[title] == 1:
+                return _RATE_LIMITED
+            return {'id': title, 'slug': title}
+
+        with patch.object(self.publisher, '_create_document', side_effect=fake_create), \
+             patch('time.sleep'):
+            results = self.publisher.create_documents(docs, max_workers=2, interval=0)
+
+        self.assertEqual(results[0]['id'], 'doc-0')
+        self.assertIsNone(results[1])
+        self.assertEqual(attempts, {'doc-0': 2, 'doc-1': self.publisher.CREATE_RATE_LIMIT_RETRIES + 1})
+
+    def test_rate_limit_delays_resubmission_until_retry_after(self):
+        """测试429后的重新提交会等到 Retry-After 指定的时间之后"""
+        limited = make_response(429, headers={'Retry-After': '5'})
+        created = make_response(200, b'{"data": {"id": 1, "title": "doc"}}')
+
+        with patch.object(self.publisher.session, 'post', side_effect=[limited, created]), \
+             patch('time.sleep') as mock_sleep:
+            results = self.publisher.create_documents([{'title': 'doc', 'body': 'body'}], interval=0)
+
+        self.assertEqual(results[0]['id'], 1)
+        self.assertAlmostEqual(max(call.args[0] for call in mock_sleep.call_args_list), 5, delta=0.5)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)